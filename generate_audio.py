@@ -1,12 +1,14 @@
 # generate_audio.py
 # Create native MP3s for Russian numbers 0–10
-# Run: python generate_audio.py
+# Run: python generate_audio.py            (skips MP3s that already exist)
+#      python generate_audio.py --force    (re-download everything)
 
 from gtts import gTTS
+import argparse
 import os
 import unicodedata
-import re
-import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 AUDIO_DIR = "audio_native"
 
@@ -25,8 +27,21 @@ WORDS = [
     ("де́сять", "ten"),
 ]
 
+# Combining marks that show up after NFD in Russian input (stress accents etc.)
+_COMBINING_DROP = str.maketrans('', '', '\u0300\u0301\u0302\u0303\u0304\u0306\u0307\u0308\u030b\u030c\u0327')
+
+# Drop accents and punctuation, fold ё→е, map path separators to '-' (one translate pass)
+_SANITIZE_TABLE = str.maketrans(
+    {"ё": "е", "Ё": "Е", "/": "-", "\\": "-", **{c: None for c in '?!:;,"\'.…—–-'}, **_COMBINING_DROP}
+)
+
+parser = argparse.ArgumentParser(description="Generate native MP3s with Google TTS.")
+parser.add_argument("--force", action="store_true", help="regenerate files that already exist")
+args = parser.parse_args()
+
 os.makedirs(AUDIO_DIR, exist_ok=True)
 
+@lru_cache(maxsize=512)
 def sanitize_filename(text: str) -> str:
     """
     Make a safe, consistent Cyrillic filename:
@@ -35,25 +50,25 @@ def sanitize_filename(text: str) -> str:
     - remove punctuation that can confuse filesystems
     - collapse whitespace; trim
     """
-    no_accents = ''.join(
-        c for c in unicodedata.normalize('NFD', text)
-        if unicodedata.category(c) != 'Mn'
-    )
-    yo_fixed = no_accents.replace("ё", "е").replace("Ё", "Е")
-    cleaned = re.sub(r'[?!:;,"\'.…—–-]', '', yo_fixed)
-    cleaned = cleaned.replace('/', '-').replace('\\', '-')
-    cleaned = re.sub(r'\s+', ' ', cleaned).strip()
-    return cleaned
-
-for rus, eng in WORDS:
+    cleaned = unicodedata.normalize('NFD', text).translate(_SANITIZE_TABLE)
+    return ' '.join(cleaned.split())
+
+def _make(word):
+    rus, eng = word
     try:
-        tts = gTTS(text=rus, lang='ru')
         filename = sanitize_filename(rus) + ".mp3"   # e.g., "нуль.mp3", "один.mp3"
         out_path = os.path.join(AUDIO_DIR, filename)
+        if os.path.exists(out_path) and not args.force:
+            print(f"⏭️  Skip: {filename} (already exists)")
+            return
+        tts = gTTS(text=rus, lang='ru')
         tts.save(out_path)
         print(f"✅ Saved: {out_path}  ← {rus} ({eng})")
-        time.sleep(0.4)  # tiny pause to be polite to the service
     except Exception as e:
         print(f"❌ Failed: {rus} ({eng}) -> {e}")
 
+# Requests are network-bound; a small pool keeps us polite to the service
+with ThreadPoolExecutor(max_workers=4) as ex:
+    list(ex.map(_make, WORDS))
+
 print("\nDone. Files are in ./audio_native")
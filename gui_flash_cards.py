@@ -1,14 +1,22 @@
 # gui_flashcards.py
 import tkinter as tk
 from tkinter import ttk, messagebox
-import csv, os, threading, unicodedata, re
+import csv, os, threading, unicodedata
+from collections import defaultdict
+from functools import lru_cache
 from pydub import AudioSegment
-from pydub.playback import play
 from pydub.utils import which
+import numpy as np
 import sounddevice as sd
 import soundfile as sf
 import time
 
+try:
+    import miniaudio  # in-process MP3 decoding, no ffmpeg subprocess per click
+except ImportError:
+    miniaudio = None
+    print("⚠️ miniaudio not installed; MP3 playback falls back to ffmpeg (pip install miniaudio)")
+
 WORD_LIST_FILE = "word_list.csv"
 AUDIO_FOLDER = "audio_native"
 RECORDINGS_FOLDER = "audio_user"
@@ -16,16 +24,24 @@ RECORDINGS_FOLDER = "audio_user"
 # Ensure ffmpeg is known to pydub (Homebrew installs to /opt/homebrew/bin on Apple Silicon)
 AudioSegment.converter = which("ffmpeg") or "/opt/homebrew/bin/ffmpeg"
 
+# str.translate tables: drop punctuation, fold ё/Ё → е/Е
+_DROP_TABLE = str.maketrans('', '', '?!:;,"\'.…—–-')
+_YO_TABLE = str.maketrans({"ё": "е", "Ё": "Е"})
+# Combining marks that show up after NFD in Russian input: stress accents,
+# plus the diaeresis of ё and the breve of й (both folded, as before).
+_COMBINING_DROP = str.maketrans('', '', '\u0300\u0301\u0302\u0303\u0304\u0306\u0307\u0308\u030b\u030c\u0327')
+# sanitize_filename additionally maps path separators to '-'. Built as a single
+# table so the '-' produced for '/' is not itself dropped as punctuation.
+_SANITIZE_TABLE = {**_COMBINING_DROP, **_DROP_TABLE, **_YO_TABLE, **str.maketrans({"/": "-", "\\": "-"})}
+_NORM_TABLE = {**_COMBINING_DROP, **_DROP_TABLE, **_YO_TABLE}
+
+@lru_cache(maxsize=512)
 def sanitize_filename(text: str) -> str:
     """Produce a safe base name: strip accents, normalize ё→е, drop punctuation, trim spaces."""
-    no_accents = ''.join(
-        c for c in unicodedata.normalize('NFD', text)
-        if unicodedata.category(c) != 'Mn'
-    )
-    yo_fixed = no_accents.replace("ё", "е").replace("Ё", "Е")
-    cleaned = re.sub(r'[?!:;,"\'.…—–-]', '', yo_fixed).replace('/', '-').replace('\\', '-')
-    return re.sub(r'\s+', ' ', cleaned).strip()
+    cleaned = unicodedata.normalize('NFD', text).translate(_SANITIZE_TABLE)
+    return ' '.join(cleaned.split())
 
+@lru_cache(maxsize=512)
 def norm_base(name: str) -> str:
     """
     Normalize any filename (or word) to a comparable base:
@@ -34,76 +50,130 @@ def norm_base(name: str) -> str:
     - ё→е, drop punctuation, collapse spaces, lowercase
     """
     base = os.path.splitext(name)[0]
-    base = unicodedata.normalize('NFD', base)
-    base = ''.join(c for c in base if unicodedata.category(c) != 'Mn')
-    base = base.replace("ё", "е").replace("Ё", "Е")
-    base = re.sub(r'[?!:;,"\'.…—–-]', '', base)
-    base = re.sub(r'\s+', ' ', base).strip()
+    if base.isascii():
+        # Nothing to decompose or fold
+        return ' '.join(base.translate(_DROP_TABLE).split()).lower()
+    # Quick check: skip the decomposition when it would be a no-op (e.g. no й/ё)
+    if not unicodedata.is_normalized('NFD', base):
+        base = unicodedata.normalize('NFD', base)
+    base = base.translate(_NORM_TABLE)
+    base = ' '.join(base.split())
     return base.lower()
 
-def find_audio_path(display_word: str) -> str | None:
-    """
-    Try to find the best-matching MP3 in AUDIO_FOLDER for display_word.
-    Handles stress marks, ё/е, NFC/NFD, punctuation, spaces, case.
-    """
-    if not os.path.isdir(AUDIO_FOLDER):
-        return None
+# HFS+ stores mtimes at 1 s resolution, so a folder scanned in the same second
+# as its last change may still change without its mtime moving.
+_MTIME_SLACK = 1.0
 
-    target_norm = norm_base(display_word)
-    try:
-        candidates = [f for f in os.listdir(AUDIO_FOLDER) if f.lower().endswith(".mp3")]
-    except Exception:
-        return None
+def _index_is_fresh(mtime: float, indexed_mtime: float, scanned_at: float) -> bool:
+    """True if a folder indexed at `scanned_at` (with mtime `indexed_mtime`) needs no rescan."""
+    return mtime == indexed_mtime and scanned_at - mtime > _MTIME_SLACK
 
-    # 1) Direct sanitized attempt (fast path)
-    direct = os.path.join(AUDIO_FOLDER, sanitize_filename(display_word) + ".mp3")
-    if os.path.exists(direct):
-        return direct
+# norm_base(filename) -> full path for every MP3 in AUDIO_FOLDER, plus
+# space-insensitive keys; rebuilt when the folder's mtime changes.
+_audio_index: dict[str, str] = {}
+_audio_index_mtime: float = 0
+_audio_index_scanned: float = 0
 
-    # 2) Scan for a normalized match
-    for fname in candidates:
-        if norm_base(fname) == target_norm:
-            return os.path.join(AUDIO_FOLDER, fname)
+def _rebuild_audio_index():
+    global _audio_index_mtime, _audio_index_scanned
+    try:
+        mtime = os.stat(AUDIO_FOLDER).st_mtime
+        if _audio_index and _index_is_fresh(mtime, _audio_index_mtime, _audio_index_scanned):
+            return
+        scanned = time.time()
+        with os.scandir(AUDIO_FOLDER) as it:
+            entries = [e for e in it if e.name.lower().endswith(".mp3")]
+    except OSError:
+        _audio_index.clear()
+        _audio_index_mtime = 0
+        return
 
-    # 3) Last resort: case-insensitive & space-insensitive loose match
-    loose_target = target_norm.replace(" ", "")
-    for fname in candidates:
-        if norm_base(fname).replace(" ", "") == loose_target:
-            return os.path.join(AUDIO_FOLDER, fname)
+    normed = [(norm_base(e.name), e.path) for e in entries]  # one norm_base per file
+    _audio_index.clear()
+    _audio_index.update(normed)
+    # Loose keys never shadow an exact match
+    for nb, path in normed:
+        _audio_index.setdefault(nb.replace(" ", ""), path)
+    _audio_index_mtime = mtime
+    _audio_index_scanned = scanned
 
-    return None
+def _audio_key(display_word: str) -> str:
+    """Index key for the MP3 generate_audio.py writes for display_word (sanitized name + .mp3)."""
+    return norm_base(sanitize_filename(display_word) + ".mp3")
+
+def find_audio_path(display_word: str) -> str | None:
+    """
+    Try to find the best-matching MP3 in AUDIO_FOLDER for display_word.
+    Handles stress marks, ё/е, NFC/NFD, punctuation, spaces, case.
+    """
+    return _lookup_audio(_audio_key(display_word)) or _lookup_audio(norm_base(display_word))
+
+def _lookup_audio(target_norm: str) -> str | None:
+    """Index probe for an already-normalized key (exact, then space-insensitive)."""
+    _rebuild_audio_index()
+    return _audio_index.get(target_norm) or _audio_index.get(target_norm.replace(" ", ""))
+
+_rebuild_audio_index()
+
+def _decode_mp3(path: str):
+    """Decode an MP3 into (int16 frames, sample rate), ready for sd.play."""
+    if miniaudio is not None:
+        decoded = miniaudio.decode_file(path, output_format=miniaudio.SampleFormat.SIGNED16)
+        data = np.frombuffer(decoded.samples, dtype=np.int16).reshape(-1, decoded.nchannels)
+        return data, decoded.sample_rate
+    # Fallback: pydub shells out to ffmpeg
+    audio = AudioSegment.from_mp3(path)
+    data = np.array(audio.get_array_of_samples()).reshape(-1, audio.channels)
+    return data, audio.frame_rate
 
 def load_words():
     if not os.path.exists(WORD_LIST_FILE):
         messagebox.showerror("Missing word list", f"Can't find {WORD_LIST_FILE} in the project folder.")
         return []
+    words = []
     with open(WORD_LIST_FILE, encoding='utf-8') as f:
-        return list(csv.reader(f))
+        for r in csv.reader(f):
+            # Gracefully handle 3- or 4-column CSVs (and blank lines)
+            rus, eng, ipa, fname = (r + ["", "", "", ""])[:4]
+            words.append((rus, eng, ipa, fname, _audio_key(rus), find_audio_path(rus)))
+    return words
+
+rows = load_words()  # [ (rus, eng, ipa, filename, _audio_key(rus), mp3 path or None), ... ]
+
+# Set while a clip is playing; extra clicks are dropped instead of piling up threads
+_playing = threading.Event()
+
+# MP3 path -> decoded (frames, sample rate); the word list is small enough to keep in memory
+_audio_cache: dict[str, tuple[np.ndarray, int]] = {}
+
+def _preload_audio():
+    for r in rows:
+        path = r[5]
+        if not path or path in _audio_cache:
+            continue
+        try:
+            _audio_cache[path] = _decode_mp3(path)
+        except Exception as e:
+            print(f"⚠️ Could not preload {path}: {e}")
 
-rows = load_words()  # [ [rus, eng, ipa, filename?], ... ]
+# Decode in the background so the window appears right away
+threading.Thread(target=_preload_audio, daemon=True).start()
 
-def play_audio(display_word: str, filename_hint: str):
+def play_audio(display_word: str, filename_hint: str, word_norm: str = ""):
     """
-    Prefer the CSV filename hint if present; otherwise sanitize & search.
-    Always falls back to a robust directory scan to find the correct file.
+    Prefer the CSV filename hint if present; otherwise match the word itself,
+    using its _audio_key precomputed by load_words when given.
+    Both go through the in-memory audio index instead of probing files with os.path.exists.
     """
-    # Try filename hint first (exact)
+    path = None
     if filename_hint:
-        hinted = os.path.join(AUDIO_FOLDER, f"{filename_hint}.mp3")
-        if os.path.exists(hinted):
-            path = hinted
-        else:
-            # Also try sanitized hint (in case hint contains accents/punct)
-            hinted_sanitized = os.path.join(AUDIO_FOLDER, f"{sanitize_filename(filename_hint)}.mp3")
-            path = hinted_sanitized if os.path.exists(hinted_sanitized) else None
-    else:
-        path = None
-
-    # If not found via hint, do robust lookup
-    if path is None or not os.path.exists(path):
-        path = find_audio_path(display_word)
-
-    if not path or not os.path.exists(path):
+        # The hint is a bare file name, so add the extension before norm_base strips one
+        path = (_lookup_audio(norm_base(filename_hint + ".mp3"))
+                or _lookup_audio(norm_base(sanitize_filename(filename_hint) + ".mp3")))
+    if path is None:
+        path = (_lookup_audio(word_norm) if word_norm else None) or find_audio_path(display_word)
+
+    if not path:
         messagebox.showwarning(
             "Missing audio",
             f"Not found in {AUDIO_FOLDER} for:\n{display_word}\n"
@@ -111,18 +181,32 @@ def play_audio(display_word: str, filename_hint: str):
         )
         return
 
+    if _playing.is_set():
+        return
+    _playing.set()
     print(f"🔊 Playing: {path}")
 
     def run():
         try:
-            audio = AudioSegment.from_mp3(path)
-            play(audio)
+            cached = _audio_cache.get(path)
+            if cached is None:
+                cached = _audio_cache[path] = _decode_mp3(path)
+            data, fs = cached
+            sd.play(data, fs)
+            sd.wait()
         except Exception as e:
-            messagebox.showerror("Playback error", str(e))
+            err = str(e)
+            root.after(0, lambda: messagebox.showerror("Playback error", err))
+        finally:
+            _playing.clear()
 
     threading.Thread(target=run, daemon=True).start()
 
-def record_audio(display_word: str, seconds=3):
+def record_audio(display_word: str, seconds=3, on_done=None):
+    """
+    Record `seconds` of microphone input on a worker thread.
+    Dialogs and `on_done` are dispatched back onto the Tk thread via root.after.
+    """
     os.makedirs(RECORDINGS_FOLDER, exist_ok=True)
     base = sanitize_filename(display_word)
     # To keep multiple takes, uncomment the timestamped version and comment the fixed name:
@@ -130,44 +214,80 @@ def record_audio(display_word: str, seconds=3):
     # out_wav = os.path.join(RECORDINGS_FOLDER, f"{base}_your_voice_{stamp}.wav")
     out_wav = os.path.join(RECORDINGS_FOLDER, f"{base}_your_voice.wav")
     fs = 44100
+
+    # Record into a temp file so a failed take never clobbers the previous one
+    tmp_wav = out_wav + ".part"
+
+    def _worker():
+        try:
+            # Stream 16-bit blocks straight to disk instead of buffering the whole take
+            with sf.SoundFile(tmp_wav, 'w', fs, 1, 'PCM_16', format='WAV') as f:
+                with sd.InputStream(samplerate=fs, channels=1, dtype='int16',
+                                    callback=lambda indata, *_: f.write(indata)):
+                    sd.sleep(int(seconds * 1000))
+            os.replace(tmp_wav, out_wav)
+            root.after(0, lambda: _add_user_recording(out_wav))  # index is only touched on the Tk thread
+            root.after(0, lambda: messagebox.showinfo("Saved", f"Recording saved:\n{out_wav}"))
+        except Exception as e:
+            try:
+                os.remove(tmp_wav)
+            except OSError:
+                pass
+            err = str(e)
+            root.after(0, lambda: messagebox.showerror("Record error", err))
+        finally:
+            if on_done is not None:
+                root.after(0, on_done)
+
+    threading.Thread(target=_worker, daemon=True).start()
+
+# sanitized word base -> [(mtime, path), ...] for every WAV in RECORDINGS_FOLDER;
+# rebuilt when the folder's mtime changes.
+_user_rec_index: defaultdict[str, list[tuple[float, str]]] = defaultdict(list)
+_user_rec_index_mtime: float = 0
+_user_rec_index_scanned: float = 0
+
+def _user_rec_base(fname: str) -> str:
+    """'<base>_your_voice[_<stamp>].wav' -> '<base>'."""
+    return os.path.splitext(fname)[0].split("_your_voice")[0]
+
+def _rebuild_user_rec_index():
+    global _user_rec_index_mtime, _user_rec_index_scanned
+    scanned = time.time()
     try:
-        rec = sd.rec(int(seconds * fs), samplerate=fs, channels=1)
-        sd.wait()
-        sf.write(out_wav, rec, fs)
-        messagebox.showinfo("Saved", f"Recording saved:\n{out_wav}")
-    except Exception as e:
-        messagebox.showerror("Record error", str(e))
+        mtime = os.stat(RECORDINGS_FOLDER).st_mtime
+        if _index_is_fresh(mtime, _user_rec_index_mtime, _user_rec_index_scanned):
+            return
+        _user_rec_index.clear()
+        with os.scandir(RECORDINGS_FOLDER) as it:
+            for entry in it:
+                if entry.name.lower().endswith(".wav"):
+                    _user_rec_index[_user_rec_base(entry.name)].append(
+                        (entry.stat().st_mtime, entry.path)  # cached on the DirEntry
+                    )
+    except OSError:
+        _user_rec_index.clear()
+        mtime = 0
+    _user_rec_index_mtime = mtime
+    _user_rec_index_scanned = scanned
+
+def _add_user_recording(path: str):
+    """
+    Make a freshly written take visible in the index right away (Tk thread only).
+    The stored mtime is left alone so other changes in the same second still trigger a rescan.
+    """
+    takes = _user_rec_index[_user_rec_base(os.path.basename(path))]
+    takes[:] = [t for t in takes if t[1] != path]  # fixed-name takes overwrite
+    takes.append((time.time(), path))
 
 def find_latest_user_recording(display_word: str) -> str | None:
     """
     Return the most recent WAV for this word in audio_user/,
     matching by sanitized base, or None if not found.
     """
-    if not os.path.isdir(RECORDINGS_FOLDER):
-        return None
-
-    base = sanitize_filename(display_word)
-    latest_path = None
-    latest_mtime = -1.0
-
-    try:
-        for fname in os.listdir(RECORDINGS_FOLDER):
-            if not fname.lower().endswith(".wav"):
-                continue
-            if not os.path.splitext(fname)[0].startswith(base):
-                continue
-            path = os.path.join(RECORDINGS_FOLDER, fname)
-            try:
-                mtime = os.path.getmtime(path)
-                if mtime > latest_mtime:
-                    latest_mtime = mtime
-                    latest_path = path
-            except OSError:
-                continue
-    except Exception:
-        return None
-
-    return latest_path
+    _rebuild_user_rec_index()
+    takes = _user_rec_index.get(sanitize_filename(display_word))
+    return max(takes)[1] if takes else None
 
 def play_user_recording(display_word: str):
     """Play the newest user recording for the selected word."""
@@ -179,14 +299,21 @@ def play_user_recording(display_word: str):
         )
         return
 
+    if _playing.is_set():
+        return
+    _playing.set()
     print(f"🔊 Playing your recording: {path}")
 
     def run():
         try:
-            audio = AudioSegment.from_file(path)  # WAV
-            play(audio)
+            data, fs = sf.read(path, dtype='float32')  # WAV needs no ffmpeg
+            sd.play(data, fs)
+            sd.wait()
         except Exception as e:
-            messagebox.showerror("Playback error", str(e))
+            err = str(e)
+            root.after(0, lambda: messagebox.showerror("Playback error", err))
+        finally:
+            _playing.clear()
 
     threading.Thread(target=run, daemon=True).start()
 
@@ -199,28 +326,22 @@ left = tk.Frame(root); left.pack(side="left", fill="both", expand=True, padx=10,
 right = tk.Frame(root); right.pack(side="right", fill="y", padx=10, pady=10)
 
 lst = tk.Listbox(left, width=40, height=20)
-for r in rows:
-    # Gracefully handle 3- or 4-column CSVs
-    rus = r[0] if len(r) > 0 else ""
-    eng = r[1] if len(r) > 1 else ""
-    lst.insert(tk.END, f"{rus} — {eng}")
+# One Tcl call for the whole list instead of one per row
+lst.insert(tk.END, *(f"{r[0]} — {r[1]}" for r in rows))
 lst.pack(fill="both", expand=True)
 
 sel_word = tk.StringVar()
 sel_eng = tk.StringVar()
 sel_ipa = tk.StringVar()
 sel_filename = tk.StringVar()
+sel_norm = tk.StringVar()
 
 def on_select(_e=None):
     if not lst.curselection():
         return
-    i = lst.curselection()[0]
-    # Support both 3-col (rus, eng, ipa) and 4-col (rus, eng, ipa, filename)
-    rus = rows[i][0] if len(rows[i]) > 0 else ""
-    eng = rows[i][1] if len(rows[i]) > 1 else ""
-    ipa = rows[i][2] if len(rows[i]) > 2 else ""
-    fname = rows[i][3] if len(rows[i]) > 3 else ""
+    rus, eng, ipa, fname, norm, _path = rows[lst.curselection()[0]]
     sel_word.set(rus); sel_eng.set(eng); sel_ipa.set(ipa); sel_filename.set(fname)
+    sel_norm.set(norm)
 
 lst.bind("<<ListboxSelect>>", on_select)
 
@@ -235,13 +356,14 @@ def do_play():
     if not sel_word.get():
         messagebox.showinfo("Pick a word", "Select a word first.")
         return
-    play_audio(sel_word.get(), sel_filename.get())
+    play_audio(sel_word.get(), sel_filename.get(), sel_norm.get())
 
 def do_record():
     if not sel_word.get():
         messagebox.showinfo("Pick a word", "Select a word first.")
         return
-    record_audio(sel_word.get(), seconds=3)
+    record_btn.config(state="disabled")
+    record_audio(sel_word.get(), seconds=3, on_done=lambda: record_btn.config(state="normal"))
 
 def do_play_user():
     if not sel_word.get():
@@ -250,7 +372,8 @@ def do_play_user():
     play_user_recording(sel_word.get())
 
 ttk.Button(right, text="▶️ Play", command=do_play).pack(fill="x", pady=6)
-ttk.Button(right, text="🎤 Record (3s)", command=do_record).pack(fill="x", pady=6)
+record_btn = ttk.Button(right, text="🎤 Record (3s)", command=do_record)
+record_btn.pack(fill="x", pady=6)
 ttk.Button(right, text="▶️ Play My Recording", command=do_play_user).pack(fill="x", pady=6)
 
 print("✅ GUI launched")